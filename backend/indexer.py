@@ -6,35 +6,167 @@ Designed to be modular: add new file processors (e.g. PPTX) alongside
 the PDF processor without refactoring.
 """
 
+from __future__ import annotations
+
+import contextlib
+import functools
 import hashlib
+import json
+import mmap
+import multiprocessing
 import os
+import queue
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import fitz  # PyMuPDF
-import chromadb
-import ollama
+import httpx
+import numpy as np
+
+if TYPE_CHECKING:
+    import chromadb
 
 EMBED_MODEL = "nomic-embed-text"
+# EMBED_BACKEND=onnx embeds in-process with MiniLM (the onnxruntime model
+# that ships with chromadb) instead of calling Ollama: no HTTP round trip
+# per query, at the cost of a smaller model that only reads the first 256
+# tokens of each chunk. Vectors from the two can't be mixed, so switching
+# backends rebuilds the index.
+EMBED_BACKEND = os.environ.get("EMBED_BACKEND", "ollama")
+LOCAL_EMBED_MODEL = "all-MiniLM-L6-v2"
+ACTIVE_EMBED_MODEL = LOCAL_EMBED_MODEL if EMBED_BACKEND == "onnx" else EMBED_MODEL
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+if "://" not in OLLAMA_HOST:
+    OLLAMA_HOST = f"http://{OLLAMA_HOST}"
+# Sent with every Ollama request so our models stay loaded between uses
+# instead of being unloaded after Ollama's default 5 minutes
+KEEP_ALIVE = "24h"
 CHROMA_DIR = os.path.join(os.path.dirname(__file__), "chroma_data")
 COLLECTION_NAME = "slides"
+# Folder-level index info (root folder, fingerprint, indexed files) lives
+# next to the vector store rather than inside it
+ROOT_INFO_PATH = os.path.join(CHROMA_DIR, "root.json")
 SUPPORTED_EXTENSIONS = {".pdf", ".pptx", ".docx", ".txt"}
+# Bump when the stored row layout or the extracted text changes; older
+# indexes are rebuilt instead of updated incrementally
+INDEX_SCHEMA = 7
+
+# Extraction runs in worker processes: PyMuPDF holds the GIL, so threads
+# would not help.
+MAX_WORKERS = min(os.cpu_count() or 1, 8)
+# Indexing runs on a worker thread of a threaded server, and forking a
+# process that has other threads running can deadlock the child, so
+# workers are started from a clean process instead
+POOL_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+# PDFs at least this large are split into page ranges so that a single
+# huge document is spread across workers instead of pinning one core.
+LARGE_PDF_BYTES = 10 * 1024 * 1024
+PDF_PAGES_PER_TASK = 50
+# Extracted files waiting to be embedded; bounds memory while the
+# extraction and embedding stages overlap
+EXTRACT_QUEUE_SIZE = 4
+
+# Embedding batch sizes; Ollama keeps up with much larger batches on a GPU
+CPU_EMBED_BATCH_SIZE = 32
+GPU_EMBED_BATCH_SIZE = 128
+# Batches are also capped by estimated tokens, so a few very long pages
+# don't hold up a whole batch of short ones
+MAX_TOKENS_PER_BATCH = 8192
+CHARS_PER_TOKEN = 4
+# Pages longer than LONG_PAGE_CHARS are stored as several rows of at most
+# CHUNK_CHARS each, instead of being silently truncated by the embed model
+LONG_PAGE_CHARS = 8000
+CHUNK_CHARS = 2000
+# Search result previews are precomputed and stored with each row
+SNIPPET_CHARS = 300
+# Leading text of each chunk stored for use as chat context
+CONTEXT_CHARS = 1500
+# Blank-page check looks at this many leading characters first
+BLANK_PROBE_CHARS = 64
+# Rows per collection.add call
+ADD_BATCH_SIZE = 250
+
+# One keep-alive connection to Ollama, reused for every embedding call
+_ollama = httpx.Client(base_url=OLLAMA_HOST, timeout=60.0)
+
+# Opened on first use rather than at import, since extraction workers
+# import this module too and have no use for the database. chromadb itself
+# is imported here for the same reason: it is slow to import, and every
+# worker process pays for this module's imports.
+_client: chromadb.ClientAPI | None = None
+
+
+def get_client() -> chromadb.ClientAPI:
+    """Return the process-wide ChromaDB client."""
+    global _client
+    if _client is None:
+        import chromadb
+        _client = chromadb.PersistentClient(path=CHROMA_DIR)
+    return _client
+
+
+@contextlib.contextmanager
+def _open_pdf(pdf_path: str) -> Iterator[fitz.Document]:
+    """Open a PDF through a read-only memory map.
+
+    MuPDF then reads the file straight from the page cache instead of
+    through buffered reads. Only for the extraction workers: a file
+    truncated while mapped raises SIGBUS, which would take down the server.
+    """
+    with open(pdf_path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mm)
+    doc = fitz.open(stream=view, filetype="pdf")
+    try:
+        yield doc
+    finally:
+        doc.close()
+        view.release()
+        mm.close()
+
+
+def _clean_text(text: str) -> str:
+    """Strip extracted text, returning "" if it is blank.
+
+    Non-blank pages nearly always have content near the start, so a short
+    prefix settles it; only whitespace-led text is scanned in full.
+    """
+    if not text:
+        return ""
+    if text[:BLANK_PROBE_CHARS].isspace() and text.isspace():
+        return ""
+    return text.strip()
+
+
+def _pdf_page_text(page: fitz.Page) -> str:
+    """Text of a PDF page; reading the TextPage directly skips get_text()'s option handling.
+
+    Uses the same flags get_text() would; the TextPage default leaves out
+    TEXT_PRESERVE_WHITESPACE, which turns tabs into U+FFFD.
+    """
+    return _clean_text(page.get_textpage(flags=fitz.TEXTFLAGS_TEXT).extractText())
 
 
-def extract_pages_from_pdf(pdf_path: str) -> list[dict]:
+def extract_pages_from_pdf(pdf_path: str, start: int = 0, end: int | None = None) -> list[dict]:
     """Extract text from each page of a PDF file.
 
+    `start`/`end` select a 0-indexed page range (default: whole document).
     Returns a list of dicts: {page_number (1-indexed), text}
     """
     pages = []
-    doc = fitz.open(pdf_path)
-    for i in range(len(doc)):
-        text = doc[i].get_text().strip()
-        if text:  # skip empty pages
-            pages.append({
-                "page_number": i + 1,  # 1-indexed for display
-                "text": text,
-            })
-    doc.close()
+    with _open_pdf(pdf_path) as doc:
+        # doc.pages() streams pages instead of random-access indexing
+        for i, page in enumerate(doc.pages(start, end), start=start):
+            text = _pdf_page_text(page)
+            if text:  # skip empty pages
+                pages.append({
+                    "page_number": i + 1,  # 1-indexed for display
+                    "text": text,
+                })
     return pages
 
 
@@ -48,7 +180,7 @@ def extract_pages_from_pptx(pptx_path: str) -> list[dict]:
         for shape in slide.shapes:
             if shape.has_text_frame:
                 texts.append(shape.text_frame.text)
-        text = "\n".join(texts).strip()
+        text = _clean_text("\n".join(texts))
         if text:
             pages.append({"page_number": i, "text": text})
     return pages
@@ -58,7 +190,7 @@ def extract_pages_from_docx(docx_path: str) -> list[dict]:
     """Extract text from a DOCX file as a single 'page'."""
     from docx import Document
     doc = Document(docx_path)
-    text = "\n".join(p.text for p in doc.paragraphs).strip()
+    text = _clean_text("\n".join(p.text for p in doc.paragraphs))
     if text:
         return [{"page_number": 1, "text": text}]
     return []
@@ -66,7 +198,7 @@ def extract_pages_from_docx(docx_path: str) -> list[dict]:
 
 def extract_pages_from_txt(txt_path: str) -> list[dict]:
     """Read a plain text file as a single 'page'."""
-    text = Path(txt_path).read_text(encoding="utf-8", errors="replace").strip()
+    text = _clean_text(Path(txt_path).read_text(encoding="utf-8", errors="replace"))
     if text:
         return [{"page_number": 1, "text": text}]
     return []
@@ -80,153 +212,473 @@ EXTRACTORS = {
 }
 
 
-def scan_folder(folder_path: str) -> list[dict]:
-    """Recursively scan a folder for supported files and extract pages.
+def read_page_texts(folder_path: str, file_path: str, page_numbers: Iterable[int]) -> dict[int, str]:
+    """Re-extract the text of some pages of an indexed file.
 
-    Returns a list of dicts: {file_path (relative), page_number, text}
+    Page text is not stored in the index, so it is read back from the
+    source file when needed. Returns {page_number: text}; pages that no
+    longer exist (or a file that can't be read) are left out.
     """
-    root = Path(folder_path)
-    all_pages = []
+    path = os.path.join(folder_path, file_path)
+    wanted = set(page_numbers)
+    ext = os.path.splitext(file_path)[1].casefold()
+    try:
+        if ext == ".pdf":
+            # Only the requested pages are loaded. Opened normally, not
+            # through _open_pdf: this runs inside the server process
+            with fitz.open(path) as doc:
+                return {
+                    n: _pdf_page_text(doc.load_page(n - 1))
+                    for n in wanted if 1 <= n <= len(doc)
+                }
+        pages = EXTRACTORS[ext](path)
+    except Exception:
+        return {}
+    return {p["page_number"]: p["text"] for p in pages if p["page_number"] in wanted}
 
-    for file_path in sorted(root.rglob("*")):
-        if file_path.suffix.lower() not in SUPPORTED_EXTENSIONS:
-            continue
-        if not file_path.is_file():
+
+def _iter_supported_files(root: str) -> Iterator[tuple[str, int]]:
+    """Recursively yield (path, mtime_ns) for each supported file under root.
+
+    Walks with os.scandir so unsupported entries are filtered on the name
+    alone, and the stat needed for the mtime is cached on the entry.
+    Like Path.rglob, directory symlinks are not followed (avoiding loops
+    and duplicates) and unreadable directories are skipped.
+    """
+    try:
+        with os.scandir(root) as it:
+            entries = sorted(it, key=lambda e: e.name)
+    except OSError:
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            yield from _iter_supported_files(entry.path)
+        elif os.path.splitext(entry.name)[1].casefold() in SUPPORTED_EXTENSIONS and entry.is_file():
+            yield entry.path, entry.stat().st_mtime_ns
+
+
+def _file_mtimes(folder_path: str) -> dict[str, int]:
+    """Map each supported file's relative path to its mtime (ns), in walk order."""
+    prefix = len(os.path.join(folder_path, ""))
+    return {path[prefix:]: mtime for path, mtime in _iter_supported_files(folder_path)}
+
+
+def _folder_fingerprint(mtimes: dict[str, int]) -> str:
+    """Compute a hash of file paths + modification times in a folder.
+
+    Only used to detect changes, so a short blake2b digest is plenty.
+    """
+    entries = [f"{path}:{mtime}" for path, mtime in mtimes.items()]
+    return hashlib.blake2b("\n".join(entries).encode(), digest_size=8).hexdigest()
+
+
+def _plan_tasks(folder_path: str, relative_paths: Iterable[str]) -> list[tuple[str, str, int | None, int | None]]:
+    """List extraction tasks as (relative_path, absolute_path, start, end).
+
+    Most files are a single task. Large PDFs are opened once here to count
+    pages and split into page ranges; each worker re-opens the file since
+    fitz documents can't be sent between processes.
+    """
+    tasks = []
+    for relative_path in relative_paths:
+        path = os.path.join(folder_path, relative_path)
+        ext = os.path.splitext(relative_path)[1].casefold()
+        if ext == ".pdf" and os.path.getsize(path) >= LARGE_PDF_BYTES:
+            doc = fitz.open(path)
+            num_pages = len(doc)
+            doc.close()
+            for start in range(0, num_pages, PDF_PAGES_PER_TASK):
+                end = min(start + PDF_PAGES_PER_TASK, num_pages)
+                tasks.append((relative_path, path, start, end))
+        else:
+            tasks.append((relative_path, path, None, None))
+    return tasks
+
+
+def _split_page(text: str) -> list[str]:
+    """Split an overly long page into chunks of at most CHUNK_CHARS.
+
+    Splits on paragraph breaks first, then line breaks, and only cuts
+    mid-line when a single line is longer than a chunk.
+    """
+    if len(text) <= LONG_PAGE_CHARS:
+        return [text]
+
+    pieces = []
+    for paragraph in text.split("\n\n"):
+        if len(paragraph) <= CHUNK_CHARS:
+            pieces.append(paragraph)
             continue
+        for line in paragraph.split("\n"):
+            pieces.extend(line[i : i + CHUNK_CHARS] for i in range(0, len(line), CHUNK_CHARS))
 
-        relative_path = str(file_path.relative_to(root))
-        extractor = EXTRACTORS.get(file_path.suffix.lower())
-        if not extractor:
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if not piece.strip():
             continue
-        pages = extractor(str(file_path))
+        if current and len(current) + 1 + len(piece) > CHUNK_CHARS:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current}\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
 
-        for page in pages:
-            all_pages.append({
-                "file_path": relative_path,
-                "page_number": page["page_number"],
-                "text": page["text"],
-            })
 
-    return all_pages
+def _run_task(task: tuple[str, str, int | None, int | None]) -> tuple[str, list[dict]]:
+    """Extract the pages for one task and split long ones into chunks.
 
+    Runs in a worker process. Returns (relative_path, chunks), each chunk
+    a dict: {page_number, chunk_idx, text}
+    """
+    relative_path, path, start, end = task
+    if start is not None:
+        pages = extract_pages_from_pdf(path, start, end)
+    else:
+        pages = EXTRACTORS[os.path.splitext(path)[1].casefold()](path)
+    return relative_path, [
+        {"page_number": page["page_number"], "chunk_idx": k, "text": chunk}
+        for page in pages
+        for k, chunk in enumerate(_split_page(page["text"]))
+    ]
+
+
+def _extract(tasks: list[tuple[str, str, int | None, int | None]]) -> Iterator[list[dict]]:
+    """Run extraction tasks across a process pool, yielding each task's chunks
+    (as {file_path (relative), page_number, chunk_idx, text}) in task order."""
+    executor = ProcessPoolExecutor(
+        max_workers=MAX_WORKERS,
+        mp_context=multiprocessing.get_context(POOL_START_METHOD),
+    )
+    try:
+        # Not worth spinning up workers for a single file
+        results = executor.map(_run_task, tasks, chunksize=4) if len(tasks) > 1 else map(_run_task, tasks)
+        for relative_path, pages in results:
+            yield [
+                {"file_path": relative_path, **page}
+                for page in pages
+            ]
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def _extract_in_background(tasks: list[tuple[str, str, int | None, int | None]]) -> Iterator[list[dict]]:
+    """Like _extract, but extraction runs ahead on a background thread.
+
+    Extracted page lists are handed over through a bounded queue, so the
+    caller can embed one file while the pool is still extracting the next.
+    """
+    pending: queue.Queue = queue.Queue(maxsize=EXTRACT_QUEUE_SIZE)
+    stop = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        # Give up if the consumer went away, rather than block forever
+        while not stop.is_set():
+            try:
+                pending.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce() -> None:
+        try:
+            for pages in _extract(tasks):
+                if not put(pages):
+                    return
+        except BaseException as e:
+            put(e)
+        else:
+            put(done)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while (item := pending.get()) is not done:
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
+
+def scan_folder(folder_path: str) -> list[dict]:
+    """Recursively scan a folder for supported files and extract pages.
 
-def generate_embeddings(texts: list[str]) -> list[list[float]]:
-    """Generate embeddings for a list of texts using Ollama."""
-    result = ollama.embed(model=EMBED_MODEL, input=texts)
-    return result.embeddings
+    Files are extracted in parallel across a process pool; results keep
+    the sorted file order. Long pages come back as several chunks.
+    Returns a list of dicts: {file_path (relative), page_number, chunk_idx, text}
+    """
+    tasks = _plan_tasks(folder_path, _file_mtimes(folder_path))
+    return [page for pages in _extract(tasks) for page in pages]
 
 
-def _folder_fingerprint(folder_path: str) -> str:
-    """Compute a hash of file paths + modification times in a folder."""
-    root = Path(folder_path)
-    entries = []
-    for fp in sorted(root.rglob("*")):
-        if fp.suffix.lower() in SUPPORTED_EXTENSIONS and fp.is_file():
-            entries.append(f"{fp}:{fp.stat().st_mtime_ns}")
-    return hashlib.sha256("\n".join(entries).encode()).hexdigest()[:16]
+@functools.lru_cache(maxsize=1)
+def _local_embedder():
+    """Load the in-process MiniLM model; downloaded on first use."""
+    from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+    return ONNXMiniLM_L6_V2(preferred_providers=["CPUExecutionProvider"])
 
 
-def index_folder(folder_path: str) -> dict:
-    """Index all supported files in a folder into ChromaDB.
+def generate_embeddings(texts: list[str]) -> np.ndarray:
+    """Generate embeddings for a list of texts using Ollama's batch endpoint
+    (or the local model, with EMBED_BACKEND=onnx).
 
-    Returns a summary dict with counts. Skips re-indexing if unchanged.
+    Returns a (len(texts), dims) float32 array.
     """
-    fingerprint = _folder_fingerprint(folder_path)
-
-    # Check if already indexed with same fingerprint
-    client = chromadb.PersistentClient(path=CHROMA_DIR)
+    if EMBED_BACKEND == "onnx":
+        return np.asarray(_local_embedder()(texts), dtype=np.float32)
+    response = _ollama.post("/api/embed", json={
+        "model": EMBED_MODEL,
+        "input": texts,
+        "keep_alive": KEEP_ALIVE,
+    })
+    response.raise_for_status()
+    return np.asarray(response.json()["embeddings"], dtype=np.float32)
+
+
+def _embed_with_retry(texts: list[str], delay: float = 1.0) -> np.ndarray:
+    """Like generate_embeddings, but on a timeout wait, then retry the batch
+    as two halves (backing off further each time they split again)."""
     try:
-        collection = client.get_collection(COLLECTION_NAME)
-        root_doc = collection.get(ids=["__root__"])
-        if root_doc["metadatas"]:
-            stored_fp = root_doc["metadatas"][0].get("fingerprint")
-            stored_root = root_doc["metadatas"][0].get("root_folder")
-            if stored_fp == fingerprint and stored_root == folder_path:
-                # Count existing documents (minus the __root__ marker)
-                total = collection.count() - 1
-                files = set()
-                # Get all unique file paths from metadata
-                all_meta = collection.get(where={"file_path": {"$ne": "__root__"}})
-                for m in all_meta["metadatas"]:
-                    files.add(m["file_path"])
-                return {
-                    "status": "ok",
-                    "total_pages": total,
-                    "total_files": len(files),
-                    "files": sorted(files),
-                    "message": "Already indexed (no changes detected)",
-                }
-    except Exception:
-        pass
+        return generate_embeddings(texts)
+    except httpx.TimeoutException:
+        if len(texts) == 1:
+            raise
+        time.sleep(delay)
+        mid = len(texts) // 2
+        return np.concatenate([
+            _embed_with_retry(texts[:mid], delay * 2),
+            _embed_with_retry(texts[mid:], delay * 2),
+        ])
+
+
+def _embed_batch_size() -> int:
+    """Pick the embedding batch size based on where Ollama runs the model.
+
+    Must be called after the model is loaded (i.e. after a first embed call),
+    since /api/ps only lists resident models.
+    """
+    if EMBED_BACKEND == "onnx":
+        return CPU_EMBED_BATCH_SIZE
+    try:
+        response = _ollama.get("/api/ps")
+        response.raise_for_status()
+        models = response.json().get("models", [])
+    except httpx.HTTPError:
+        return CPU_EMBED_BATCH_SIZE
+    for model in models:
+        if model.get("name", "").split(":")[0] == EMBED_MODEL and model.get("size_vram", 0) > 0:
+            return GPU_EMBED_BATCH_SIZE
+    return CPU_EMBED_BATCH_SIZE
+
+
+def load_root_info() -> dict | None:
+    """Read the info saved by the last completed index, if any.
+
+    Keys: root_folder, fingerprint, schema, embed_model,
+    files ({relative_path: mtime_ns}), total_pages.
+    """
+    try:
+        with open(ROOT_INFO_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_root_info(info: dict) -> None:
+    # Write-then-rename so readers never see a half-written file
+    tmp_path = ROOT_INFO_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(info, f)
+    os.replace(tmp_path, ROOT_INFO_PATH)
 
-    pages = scan_folder(folder_path)
-    if not pages:
-        return {"status": "error", "message": "No supported files found", "total_pages": 0}
 
-    # Delete existing collection if re-indexing
+def _clear_root_info() -> None:
     try:
-        client.delete_collection(COLLECTION_NAME)
-    except Exception:
+        os.remove(ROOT_INFO_PATH)
+    except FileNotFoundError:
         pass
 
-    collection = client.create_collection(
-        name=COLLECTION_NAME,
-        metadata={"hnsw:space": "cosine"},
-    )
 
-    # Store the root folder path so we can resolve files later
-    # (stored as collection metadata isn't supported for arbitrary keys,
-    #  so we store it in a special document)
-    collection.add(
-        ids=["__root__"],
-        documents=["__root_folder__"],
-        metadatas=[{"file_path": "__root__", "page_number": 0, "root_folder": folder_path, "fingerprint": fingerprint}],
-        embeddings=[generate_embeddings(["root folder marker"])[0]],
-    )
+def _snippet(text: str) -> str:
+    """Whitespace-normalized preview of a page, as shown in search results."""
+    snippet = " ".join(text[:SNIPPET_CHARS].split())
+    if len(text) > SNIPPET_CHARS:
+        snippet += "..."
+    return snippet
 
-    # Batch embed and insert (batch size to avoid overwhelming Ollama)
-    batch_size = 32
-    total = len(pages)
-    files_seen = set()
 
-    for start in range(0, total, batch_size):
-        batch = pages[start : start + batch_size]
-        texts = [p["text"] for p in batch]
-        embeddings = generate_embeddings(texts)
-
-        ids = []
-        documents = []
-        metadatas = []
-
-        for i, page in enumerate(batch):
-            doc_id = f"{page['file_path']}::page_{page['page_number']}"
-            ids.append(doc_id)
-            documents.append(page["text"])
-            metadatas.append({
-                "file_path": page["file_path"],
-                "page_number": page["page_number"],
-            })
-            files_seen.add(page["file_path"])
+def _embed_pages(batch: list[dict], rows: dict[str, list], mtimes: dict[str, int]) -> None:
+    """Embed a batch of pages and append them to `rows` for collection.add.
 
+    Each row records its file's mtime so later runs can tell which files
+    changed.
+    """
+    embeddings = _embed_with_retry([p["text"] for p in batch])
+
+    for page in batch:
+        doc_id = f"{page['file_path']}::page_{page['page_number']}::chunk_{page['chunk_idx']}"
+        rows["ids"].append(doc_id)
+        rows["metadatas"].append({
+            "file_path": page["file_path"],
+            "page_number": page["page_number"],
+            "chunk_idx": page["chunk_idx"],
+            "mtime_ns": mtimes[page["file_path"]],
+            "snippet": _snippet(page["text"]),
+            "context": page["text"][:CONTEXT_CHARS],
+        })
+    rows["embeddings"].append(embeddings)
+
+
+def _flush_rows(collection: chromadb.Collection, rows: dict[str, list]) -> None:
+    """Add the accumulated rows to the collection in one call and reset them.
+
+    rows["embeddings"] holds one array per embedding batch; they are stacked
+    into a single (N, dims) array for the add.
+    """
+    if rows["ids"]:
         collection.add(
-            ids=ids,
-            documents=documents,
-            metadatas=metadatas,
-            embeddings=embeddings,
+            ids=rows["ids"],
+            metadatas=rows["metadatas"],
+            embeddings=np.concatenate(rows["embeddings"]),
+        )
+    for values in rows.values():
+        values.clear()
+
+
+def index_folder(folder_path: str) -> dict:
+    """Index all supported files in a folder into ChromaDB.
+
+    Returns a summary dict with counts. Skips re-indexing if unchanged;
+    if the folder was indexed before, only new or modified files are
+    re-extracted and embedded, and removed files are dropped.
+    """
+    # One walk of the folder serves the fingerprint, the change check and
+    # extraction planning
+    mtimes = _file_mtimes(folder_path)
+    fingerprint = _folder_fingerprint(mtimes)
+
+    # Check if already indexed with same fingerprint
+    client = get_client()
+    root_info = load_root_info()
+    collection = None
+    if (
+        root_info is not None
+        and root_info.get("root_folder") == folder_path
+        and root_info.get("schema") == INDEX_SCHEMA
+        and root_info.get("embed_model", EMBED_MODEL) == ACTIVE_EMBED_MODEL
+    ):
+        try:
+            collection = client.get_collection(COLLECTION_NAME)
+        except Exception:
+            pass
+
+    incremental = collection is not None
+    # {relative_path: mtime_ns} of the files that have rows in the index
+    indexed = root_info["files"] if incremental else {}
+    if incremental and root_info.get("fingerprint") == fingerprint:
+        return {
+            "status": "ok",
+            "total_pages": root_info["total_pages"],
+            "total_files": len(indexed),
+            "files": sorted(indexed),
+            "message": "Already indexed (no changes detected)",
+        }
+
+    if not mtimes:
+        return {"status": "error", "message": "No supported files found", "total_pages": 0}
+
+    # Until this run completes, the stored info no longer describes the index
+    _clear_root_info()
+
+    if incremental:
+        # Drop rows of removed or modified files (and any partial rows an
+        # interrupted run left behind); re-extract only what changed
+        changed = {rel for rel, mtime in mtimes.items() if indexed.get(rel) != mtime}
+        stale = sorted(changed | (indexed.keys() - mtimes.keys()))
+        if stale:
+            collection.delete(where={"file_path": {"$in": stale}})
+        kept = indexed.keys() - set(stale)
+    else:
+        # Different folder or index layout: rebuild from scratch
+        try:
+            client.delete_collection(COLLECTION_NAME)
+        except Exception:
+            pass
+
+        collection = client.create_collection(
+            name=COLLECTION_NAME,
+            metadata={"hnsw:space": "cosine"},
         )
+        changed = set(mtimes)
+        kept = set()
+
+    tasks = _plan_tasks(folder_path, [rel for rel in mtimes if rel in changed])
+
+    # Embed and insert while later files are still being extracted.
+    # Pages are packed greedily into batches of at most max_items pages and
+    # MAX_TOKENS_PER_BATCH estimated tokens (to avoid overwhelming Ollama).
+    max_items = CPU_EMBED_BATCH_SIZE
+    first = True
+    files_seen = set()
+    batch: list[dict] = []
+    batch_tokens = 0
+    # Rows are inserted in groups of ADD_BATCH_SIZE, independent of the
+    # embedding batch size, since each add commits to SQLite and the HNSW index
+    rows: dict[str, list] = {"ids": [], "metadatas": [], "embeddings": []}
+
+    for pages in _extract_in_background(tasks):
+        files_seen.update(p["file_path"] for p in pages)
+        for page in pages:
+            tokens = len(page["text"]) // CHARS_PER_TOKEN
+            if batch and (len(batch) >= max_items or batch_tokens + tokens > MAX_TOKENS_PER_BATCH):
+                _embed_pages(batch, rows, mtimes)
+                batch, batch_tokens = [], 0
+                if first:
+                    max_items = _embed_batch_size()
+                    first = False
+                if len(rows["ids"]) >= ADD_BATCH_SIZE:
+                    _flush_rows(collection, rows)
+            batch.append(page)
+            batch_tokens += tokens
+    if batch:
+        _embed_pages(batch, rows, mtimes)
+    _flush_rows(collection, rows)
+
+    files = kept | files_seen
+    if not files:
+        client.delete_collection(COLLECTION_NAME)
+        return {"status": "error", "message": "No supported files found", "total_pages": 0}
+
+    # Long pages span several rows; count each page once
+    total = len(collection.get(where={"chunk_idx": 0}, include=[])["ids"])
+
+    # Store the root folder path so we can resolve files later. Written
+    # last so an interrupted run is never mistaken for a complete index.
+    _save_root_info({
+        "root_folder": folder_path,
+        "fingerprint": fingerprint,
+        "schema": INDEX_SCHEMA,
+        "embed_model": ACTIVE_EMBED_MODEL,
+        "files": {rel: mtimes[rel] for rel in sorted(files)},
+        "total_pages": total,
+    })
 
     return {
         "status": "ok",
         "total_pages": total,
-        "total_files": len(files_seen),
-        "files": sorted(files_seen),
+        "total_files": len(files),
+        "files": sorted(files),
     }
 
 
 if __name__ == "__main__":
     # Quick test with the 170_Theory folder
-    import json
-
     folder = "/Users/porter/Documents/170_Theory"
     print(f"Indexing: {folder}")
     result = index_folder(folder)
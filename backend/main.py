@@ -7,29 +7,88 @@ Routes:
   POST /search  — semantic search across indexed content
   GET  /file/{path} — serve a file for viewing
   GET  /pdf/{path} — serve a PDF file (backward compat)
+  GET  /page-text/{path} — full text of one indexed page
 """
 
+import asyncio
+import contextlib
+import functools
+import hashlib
+import heapq
+import json
 import os
 import re
+import shutil
 import subprocess
 import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict
 from pathlib import Path
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, Response
-from pydantic import BaseModel
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
 
 import fitz  # PyMuPDF
 
 import chromadb
-import ollama
-
-from indexer import index_folder, CHROMA_DIR, COLLECTION_NAME, EMBED_MODEL, SUPPORTED_EXTENSIONS
+import httpx
+from chromadb.errors import NotFoundError
+import numpy as np
+
+from indexer import (
+    index_folder, get_client, generate_embeddings, load_root_info, read_page_texts,
+    ACTIVE_EMBED_MODEL, CHARS_PER_TOKEN, CHROMA_DIR, COLLECTION_NAME, EMBED_MODEL, KEEP_ALIVE, OLLAMA_HOST,
+    SUPPORTED_EXTENSIONS,
+)
 
 LLM_MODEL = "qwen3:1.7b"
-
-app = FastAPI(title="Slide Search")
+# Rough prompt budgets for /chat, in tokens, to keep prefill time bounded
+CHAT_CONTEXT_TOKENS = 3072
+CHAT_HISTORY_TOKENS = 2048
+# Cross-encoder used for reranking when flashrank is installed; otherwise
+# rerank falls back to asking LLM_MODEL to score each result
+RERANK_MODEL = "ms-marco-MiniLM-L-12-v2"
+# Pages handed to the cross-encoder, which then picks the top n_results
+RERANK_CANDIDATES = 50
+# Most LLM scoring requests in flight at once; Ollama queues the rest anyway
+LLM_RERANK_CONCURRENCY = 4
+
+# Recent /search responses are reused for a short while; the cache is
+# also cleared whenever a folder is re-indexed
+SEARCH_CACHE_SIZE = 128
+SEARCH_CACHE_TTL = 60  # seconds
+# A query whose embedding is at least this close (cosine) to a cached
+# query's reuses that query's results
+SEARCH_CACHE_SIMILARITY = 0.97
+
+# Rendered page images, keyed by file, mtime, page and scale so edits
+# invalidate them
+PAGE_CACHE_DIR = Path(CHROMA_DIR) / "page_cache"
+# Least recently viewed images are deleted once the cache grows past this;
+# it is also emptied when a different folder is indexed
+PAGE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+PAGE_IMAGE_SCALE = 2.0  # default 2x for retina quality
+PAGE_IMAGE_QUALITY = 85  # JPEG quality
+# Recently viewed PDFs are kept open between page-image requests
+PDF_DOC_CACHE_SIZE = 8
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the index up front so the first search doesn't pay for loading
+    # it; there may be no index yet, in which case it's opened after /index
+    with contextlib.suppress(HTTPException):
+        _get_collection()
+    # Load the models in the background so the first search or chat
+    # doesn't wait for them, without holding up startup
+    warm_up = asyncio.create_task(_warm_up())
+    yield
+    warm_up.cancel()
+    await _ollama_async.aclose()
+
+app = FastAPI(title="Slide Search", lifespan=lifespan)
 
 # CORS — restricted to localhost only
 app.add_middleware(
@@ -46,14 +105,13 @@ class IndexRequest(BaseModel):
 
 class SearchRequest(BaseModel):
     query: str
-    n_results: int = 10
+    n_results: int = Field(10, ge=1)
     rerank: bool = False
 
 class SearchResult(BaseModel):
     file_path: str
     page_number: int
     text_snippet: str
-    full_text: str
     similarity_score: float
 
 class IndexResponse(BaseModel):
@@ -69,11 +127,15 @@ class SearchResponse(BaseModel):
 
 class SummarizeRequest(BaseModel):
     query: str
-    text: str
+    file_path: str
+    page_number: int
 
 class SummarizeResponse(BaseModel):
     summary: str
 
+class PageTextResponse(BaseModel):
+    text: str
+
 class ChatMessage(BaseModel):
     role: str  # "user" or "assistant"
     content: str
@@ -81,31 +143,247 @@ class ChatMessage(BaseModel):
 class ChatRequest(BaseModel):
     question: str
     history: list[ChatMessage] = []
-    n_context: int = 5
+    n_context: int = Field(5, ge=1)
 
 class ChatSource(BaseModel):
     file_path: str
     page_number: int
 
-class ChatResponse(BaseModel):
-    answer: str
-    sources: list[ChatSource]
-
 # ── Helpers ────────────────────────────────────────────────────────
 
-def _get_root_folder() -> str | None:
-    """Retrieve the root folder path stored during indexing."""
-    try:
-        client = chromadb.PersistentClient(path=CHROMA_DIR)
-        collection = client.get_collection(COLLECTION_NAME)
-        result = collection.get(ids=["__root__"])
-        if result["metadatas"]:
-            return result["metadatas"][0].get("root_folder")
-    except Exception:
-        pass
-    return None
+# Cached collection handle; reset after re-indexing, which may recreate it
+_collection: chromadb.Collection | None = None
+
+def _get_collection() -> chromadb.Collection:
+    """Return the indexed collection, opening it on first use."""
+    global _collection
+    if _collection is None:
+        try:
+            collection = get_client().get_collection(COLLECTION_NAME)
+        except Exception:
+            raise HTTPException(status_code=400, detail="No index found. Please index a folder first.")
+        # Queries must be embedded with the model the index was built with
+        info = load_root_info() or {}
+        if info.get("embed_model", EMBED_MODEL) != ACTIVE_EMBED_MODEL:
+            raise HTTPException(
+                status_code=400,
+                detail="The index was built with a different embedding model. Please re-index the folder.",
+            )
+        _collection = collection
+    return _collection
 
-def _llm_relevance_score(query: str, text: str) -> int:
+def _query_collection(**kwargs) -> dict:
+    """Query the collection, reopening it once if the cached handle is stale."""
+    global _collection
+    try:
+        return _get_collection().query(**kwargs)
+    except NotFoundError:
+        # The collection was deleted or recreated since it was opened
+        _collection = None
+        return _get_collection().query(**kwargs)
+
+def _query_pages(query_embedding: list[float], n_pages: int) -> dict[tuple[str, int], tuple[dict, float]]:
+    """Return the n_pages best-matching distinct pages, best first.
+
+    Long pages are stored as several chunks, so the query is widened
+    until enough distinct pages are found or the collection runs out.
+    Maps (file_path, page_number) -> (metadata, similarity).
+    """
+    total = _get_collection().count()
+    n_chunks = min(n_pages * 2, total)
+    while True:
+        raw = _query_collection(
+            query_embeddings=[query_embedding],
+            n_results=max(n_chunks, 1),
+            include=["metadatas", "distances"],
+        )
+        # Convert cosine distances to similarity scores (0-1, higher is better)
+        similarities = (1 - np.asarray(raw["distances"][0])).round(4)
+
+        hits = {}
+        for meta, similarity in zip(raw["metadatas"][0], similarities):
+            # Hits are sorted by distance, so the first chunk seen for a
+            # page is its best match
+            page_key = (meta["file_path"], meta["page_number"])
+            if page_key not in hits:
+                hits[page_key] = (meta, float(similarity))
+            if len(hits) == n_pages:
+                return hits
+        if n_chunks >= total:
+            return hits
+        n_chunks = min(n_chunks * 2, total)
+
+# (query, n_results, rerank) -> (expiry time, unit query embedding, results)
+_search_cache: OrderedDict[tuple, tuple[float, np.ndarray, list[SearchResult]]] = OrderedDict()
+_search_cache_lock = threading.Lock()
+
+_index_lock = asyncio.Lock()
+
+# All LLM calls share one pooled client, so connections to Ollama are
+# kept alive between requests. Answers can take minutes on a slow CPU.
+_ollama_async = httpx.AsyncClient(
+    base_url=OLLAMA_HOST,
+    timeout=httpx.Timeout(300.0, connect=10.0),
+    limits=httpx.Limits(max_keepalive_connections=40, max_connections=100, keepalive_expiry=30.0),
+)
+_llm_rerank_slots = asyncio.Semaphore(LLM_RERANK_CONCURRENCY)
+
+def _normalize_query(query: str) -> str:
+    """Canonical form of a query, used both for cache keys and for embedding."""
+    return query.strip().lower()
+
+@functools.lru_cache(maxsize=1024)
+def _embed_query(query: str) -> tuple[float, ...]:
+    """Embed a (normalized) query; repeated queries skip the Ollama call.
+
+    Goes through the indexer's /api/embed client, which keeps its
+    connection to Ollama open between requests.
+    """
+    return tuple(generate_embeddings([query])[0].tolist())
+
+def _cached_search(key: tuple) -> list[SearchResult] | None:
+    with _search_cache_lock:
+        entry = _search_cache.get(key)
+        if entry is None:
+            return None
+        expires, _, results = entry
+        if expires < time.monotonic():
+            del _search_cache[key]
+            return None
+        _search_cache.move_to_end(key)
+        return results
+
+def _similar_cached_search(key: tuple, embedding: np.ndarray) -> list[SearchResult] | None:
+    """Find cached results for a near-duplicate of the query in `key`.
+
+    Compares the query embedding against those of unexpired entries with
+    the same n_results/rerank options.
+    """
+    with _search_cache_lock:
+        now = time.monotonic()
+        candidates = [
+            (cached_key, cached_embedding)
+            for cached_key, (expires, cached_embedding, _) in _search_cache.items()
+            if expires >= now and cached_key[1:] == key[1:]
+        ]
+        if not candidates:
+            return None
+        # Cached embeddings are unit length, so the dot product is the cosine
+        similarities = np.stack([e for _, e in candidates]) @ embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] < SEARCH_CACHE_SIMILARITY:
+            return None
+        best_key = candidates[best][0]
+        _search_cache.move_to_end(best_key)
+        return _search_cache[best_key][2]
+
+def _cache_search(key: tuple, embedding: np.ndarray, results: list[SearchResult]) -> None:
+    with _search_cache_lock:
+        _search_cache[key] = (time.monotonic() + SEARCH_CACHE_TTL, embedding, results)
+        _search_cache.move_to_end(key)
+        while len(_search_cache) > SEARCH_CACHE_SIZE:
+            _search_cache.popitem(last=False)
+
+# (path, mtime_ns) -> open document. fitz documents aren't thread-safe, so
+# the lock is held for as long as a document from here is in use.
+_pdf_docs: OrderedDict[tuple[str, int], fitz.Document] = OrderedDict()
+_pdf_docs_lock = threading.Lock()
+
+def _get_pdf_doc(path: Path, mtime_ns: int) -> fitz.Document:
+    """Return an open document for a PDF, reusing it if recently opened.
+
+    Callers must hold _pdf_docs_lock.
+    """
+    key = (str(path), mtime_ns)
+    doc = _pdf_docs.get(key)
+    if doc is not None:
+        _pdf_docs.move_to_end(key)
+        return doc
+    doc = fitz.open(str(path))
+    _pdf_docs[key] = doc
+    while len(_pdf_docs) > PDF_DOC_CACHE_SIZE:
+        _, evicted = _pdf_docs.popitem(last=False)
+        evicted.close()
+    return doc
+
+# Root folder of the current index; reset after re-indexing
+_root_path: Path | None = None
+_root_path_lock = threading.Lock()
+
+def _get_root_path() -> Path | None:
+    """Return the root folder stored during indexing, read on first use."""
+    global _root_path
+    root = _root_path
+    if root is None:
+        with _root_path_lock:
+            if _root_path is None:
+                info = load_root_info()
+                if info:
+                    _root_path = Path(info["root_folder"])
+            root = _root_path
+    return root
+
+# Bytes of page images on disk; None until first counted, and again
+# after the cache directory is removed
+_page_cache_bytes: int | None = None
+_page_cache_lock = threading.Lock()
+
+def _scan_page_cache() -> list[tuple[int, int, str]]:
+    """Return (mtime_ns, size, path) for every cached page image."""
+    entries = []
+    with contextlib.suppress(FileNotFoundError), os.scandir(PAGE_CACHE_DIR) as it:
+        for entry in it:
+            if entry.name.endswith(".jpg"):
+                with contextlib.suppress(FileNotFoundError):
+                    st = entry.stat()
+                    entries.append((st.st_mtime_ns, st.st_size, entry.path))
+    return entries
+
+def _add_to_page_cache(size: int) -> None:
+    """Count a newly written page image, pruning once over PAGE_CACHE_MAX_BYTES.
+
+    The directory is only scanned to take the first count and when the
+    cache is full. Cache hits touch their file, so mtime order is
+    least-recently-used order.
+    """
+    global _page_cache_bytes
+    with _page_cache_lock:
+        if _page_cache_bytes is None:
+            _page_cache_bytes = sum(size for _, size, _ in _scan_page_cache())
+        else:
+            _page_cache_bytes += size
+        if _page_cache_bytes <= PAGE_CACHE_MAX_BYTES:
+            return
+
+        entries = sorted(_scan_page_cache())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= PAGE_CACHE_MAX_BYTES:
+                break
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            total -= size
+        _page_cache_bytes = total
+
+def _load_page_texts(pages: list[tuple[str, int]]) -> dict[tuple[str, int], str]:
+    """Read (file_path, page_number) page texts back from the indexed folder.
+
+    The index only keeps snippets, so full text comes from the source
+    files; each file is opened once however many of its pages are asked for.
+    """
+    root = _get_root_path()
+    if root is None:
+        return {}
+    by_file: defaultdict[str, set[int]] = defaultdict(set)
+    for fp, pg in pages:
+        by_file[fp].add(pg)
+    texts = {}
+    for fp, page_numbers in by_file.items():
+        for pg, text in read_page_texts(str(root), fp, page_numbers).items():
+            texts[(fp, pg)] = text
+    return texts
+
+async def _llm_relevance_score(query: str, text: str) -> int:
     """Ask the LLM to rate how well a page explains the query (1-5)."""
     prompt = (
         f"/no_think\n"
@@ -115,69 +393,115 @@ def _llm_relevance_score(query: str, text: str) -> int:
         f"Slide text:\n{text[:2000]}"
     )
     try:
-        response = ollama.chat(
-            model=LLM_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-        )
-        score = int(response.message.content.strip()[0])
+        async with _llm_rerank_slots:
+            response = await _ollama_async.post("/api/chat", json={
+                "model": LLM_MODEL,
+                "messages": [{"role": "user", "content": prompt}],
+                "stream": False,
+                "keep_alive": KEEP_ALIVE,
+            })
+        response.raise_for_status()
+        score = int(response.json()["message"]["content"].strip()[0])
         return max(1, min(5, score))
     except Exception:
         return 3  # neutral fallback
 
+@functools.lru_cache(maxsize=1)
+def _get_ranker():
+    """Return the flashrank cross-encoder, or None if flashrank isn't installed.
+
+    Loaded on first rerank, since the first load downloads the model.
+    """
+    try:
+        from flashrank import Ranker
+    except ImportError:
+        return None
+    return Ranker(model_name=RERANK_MODEL, max_length=512)
+
+async def _rerank_scores(query: str, texts: list[str]) -> list[float]:
+    """Score how relevant each text is to the query, from 0 to 1."""
+    ranker = await asyncio.to_thread(_get_ranker)
+    if ranker is None:
+        # LLM scoring is I/O-bound, so score all texts concurrently
+        scores = await asyncio.gather(*(_llm_relevance_score(query, text) for text in texts))
+        return [score / 5.0 for score in scores]
+
+    from flashrank import RerankRequest
+    # One batched forward pass over all (query, text) pairs
+    passages = [{"id": i, "text": text[:2000]} for i, text in enumerate(texts)]
+    ranked = await asyncio.to_thread(ranker.rerank, RerankRequest(query=query, passages=passages))
+    scores = [0.0] * len(texts)
+    for passage in ranked:
+        scores[passage["id"]] = float(passage["score"])
+    return scores
+
 # ── Routes ─────────────────────────────────────────────────────────
 
 @app.get("/browse-folder")
-def api_browse_folder():
+async def api_browse_folder():
     """Open a native OS folder picker dialog and return the selected path."""
+    if sys.platform == "darwin":
+        # macOS: AppleScript Finder dialog
+        cmd = ["osascript", "-e",
+               'POSIX path of (choose folder with prompt "Select a folder of slides")']
+    elif sys.platform == "win32":
+        # Windows: PowerShell folder browser dialog
+        ps_script = (
+            "Add-Type -AssemblyName System.Windows.Forms; "
+            "$d = New-Object System.Windows.Forms.FolderBrowserDialog; "
+            "$d.Description = 'Select a folder of slides'; "
+            "if ($d.ShowDialog() -eq 'OK') { $d.SelectedPath } else { exit 1 }"
+        )
+        cmd = ["powershell", "-Command", ps_script]
+    else:
+        # Linux: zenity folder selection
+        cmd = ["zenity", "--file-selection", "--directory",
+               "--title=Select a folder of slides"]
+
+    # The dialog can stay open for up to two minutes, so it waits in
+    # asyncio's executor rather than the request threadpool. Not
+    # create_subprocess_exec: the Windows selector event loop can't run it.
     try:
-        if sys.platform == "darwin":
-            # macOS: AppleScript Finder dialog
-            result = subprocess.run(
-                ["osascript", "-e",
-                 'POSIX path of (choose folder with prompt "Select a folder of slides")'],
-                capture_output=True, text=True, timeout=120,
-            )
-        elif sys.platform == "win32":
-            # Windows: PowerShell folder browser dialog
-            ps_script = (
-                "Add-Type -AssemblyName System.Windows.Forms; "
-                "$d = New-Object System.Windows.Forms.FolderBrowserDialog; "
-                "$d.Description = 'Select a folder of slides'; "
-                "if ($d.ShowDialog() -eq 'OK') { $d.SelectedPath } else { exit 1 }"
-            )
-            result = subprocess.run(
-                ["powershell", "-Command", ps_script],
-                capture_output=True, text=True, timeout=120,
-            )
-        else:
-            # Linux: zenity folder selection
-            result = subprocess.run(
-                ["zenity", "--file-selection", "--directory",
-                 "--title=Select a folder of slides"],
-                capture_output=True, text=True, timeout=120,
-            )
-
-        if result.returncode != 0:
-            return {"status": "cancelled", "folder_path": None}
-
-        folder = result.stdout.strip().rstrip("/").rstrip("\\")
-        return {"status": "ok", "folder_path": folder}
-
-    except subprocess.TimeoutExpired:
-        return {"status": "cancelled", "folder_path": None}
+        result = await asyncio.to_thread(
+            subprocess.run, cmd,
+            capture_output=True, text=True, errors="replace", timeout=120,
+        )
     except FileNotFoundError:
         # Dialog tool not found (e.g. zenity not installed on Linux)
         return {"status": "error", "folder_path": None,
                 "message": "Folder picker not available on this system. Please type the path manually."}
+    except subprocess.TimeoutExpired:
+        return {"status": "cancelled", "folder_path": None}
+
+    if result.returncode != 0:
+        return {"status": "cancelled", "folder_path": None}
+
+    folder = result.stdout.strip().rstrip("/").rstrip("\\")
+    return {"status": "ok", "folder_path": folder}
 
 
 @app.post("/index", response_model=IndexResponse)
-def api_index(req: IndexRequest):
+async def api_index(req: IndexRequest):
+    global _collection, _root_path, _page_cache_bytes
     folder = req.folder_path.strip()
     if not os.path.isdir(folder):
         raise HTTPException(status_code=400, detail=f"Folder not found: {folder}")
 
-    result = index_folder(folder)
+    # Indexing is long and CPU-bound: run it off the event loop so search
+    # and file requests keep being served, one index run at a time
+    async with _index_lock:
+        previous_root = _get_root_path()
+        result = await asyncio.to_thread(index_folder, folder)
+        if previous_root is not None and previous_root != Path(folder):
+            # Images of the old folder's pages won't be viewed again
+            await asyncio.to_thread(shutil.rmtree, PAGE_CACHE_DIR, ignore_errors=True)
+            with _page_cache_lock:
+                _page_cache_bytes = None
+        _collection = None
+        with _root_path_lock:
+            _root_path = None
+        with _search_cache_lock:
+            _search_cache.clear()
 
     if result["status"] == "error":
         raise HTTPException(status_code=400, detail=result.get("message", "Indexing failed"))
@@ -192,61 +516,59 @@ def api_index(req: IndexRequest):
 
 
 @app.post("/search", response_model=SearchResponse)
-def api_search(req: SearchRequest):
+async def api_search(req: SearchRequest):
     query = req.query.strip()
     if not query:
         raise HTTPException(status_code=400, detail="Query cannot be empty")
 
-    try:
-        client = chromadb.PersistentClient(path=CHROMA_DIR)
-        collection = client.get_collection(COLLECTION_NAME)
-    except Exception:
-        raise HTTPException(status_code=400, detail="No index found. Please index a folder first.")
-
-    # Generate query embedding
-    query_embedding = ollama.embed(model=EMBED_MODEL, input=query).embeddings[0]
-
-    # Search ChromaDB
-    raw = collection.query(
-        query_embeddings=[query_embedding],
-        n_results=req.n_results + 1,  # +1 to account for __root__ marker
-        where={"file_path": {"$ne": "__root__"}},
-    )
-
-    results = []
-    for i in range(len(raw["ids"][0])):
-        meta = raw["metadatas"][0][i]
-        distance = raw["distances"][0][i]
-        text = raw["documents"][0][i]
-
-        # Convert cosine distance to similarity score (0-1, higher is better)
-        similarity = 1 - distance
+    cache_key = (_normalize_query(query), req.n_results, req.rerank)
+    cached = _cached_search(cache_key)
+    if cached is not None:
+        return SearchResponse(query=query, results=cached)
 
-        # Take first ~200 chars as snippet, clean up whitespace
-        snippet = " ".join(text[:300].split())
-        if len(text) > 300:
-            snippet += "..."
+    # Blocking work (Chroma, Ollama embeddings, file reads) runs in worker
+    # threads so the event loop stays free for concurrent rerank calls
+    await asyncio.to_thread(_get_collection)  # fail before embedding if nothing is indexed
 
-        results.append(SearchResult(
+    # Generate query embedding
+    query_embedding = await asyncio.to_thread(_embed_query, _normalize_query(query))
+    unit_embedding = np.asarray(query_embedding, dtype=np.float32)
+    unit_embedding /= np.linalg.norm(unit_embedding)
+    cached = _similar_cached_search(cache_key, unit_embedding)
+    if cached is not None:
+        return SearchResponse(query=query, results=cached)
+
+    # The cross-encoder is cheap enough to rerank a wider pool than is
+    # shown; LLM scoring costs a call per page, so it only sees n_results
+    n_pages = req.n_results
+    if req.rerank and await asyncio.to_thread(_get_ranker) is not None:
+        n_pages = max(n_pages, RERANK_CANDIDATES)
+
+    hits = await asyncio.to_thread(_query_pages, list(query_embedding), n_pages)
+
+    # Full page text isn't part of the response (the UI fetches it from
+    # /page-text when needed), so it's only read here for reranking
+    results = [
+        SearchResult(
             file_path=meta["file_path"],
             page_number=meta["page_number"],
-            text_snippet=snippet,
-            full_text=text,
-            similarity_score=round(similarity, 4),
-        ))
-
-    # Limit to requested count (in case __root__ filter didn't reduce)
-    results = results[:req.n_results]
+            text_snippet=meta["snippet"],  # precomputed at index time
+            similarity_score=similarity,
+        )
+        for meta, similarity in hits.values()
+    ]
 
-    # Optional LLM re-ranking
+    # Optional re-ranking
     if req.rerank and results:
-        for r in results:
-            llm_score = _llm_relevance_score(query, r.full_text)
-            # Combine: 60% embedding similarity + 40% LLM score (normalized to 0-1)
-            combined = 0.6 * r.similarity_score + 0.4 * (llm_score / 5.0)
+        texts = await asyncio.to_thread(_load_page_texts, list(hits))
+        scores = await _rerank_scores(query, [texts.get(page_key, "") for page_key in hits])
+        for r, score in zip(results, scores):
+            # Combine: 60% embedding similarity + 40% rerank score
+            combined = 0.6 * r.similarity_score + 0.4 * score
             r.similarity_score = round(combined, 4)
-        results.sort(key=lambda r: r.similarity_score, reverse=True)
+        results = heapq.nlargest(req.n_results, results, key=lambda r: r.similarity_score)
 
+    _cache_search(cache_key, unit_embedding, results)
     return SearchResponse(query=query, results=results)
 
 
@@ -259,13 +581,13 @@ MIME_TYPES = {
 
 
 @app.get("/file/{file_path:path}")
-def api_serve_file(file_path: str):
+async def api_serve_file(file_path: str):
     """Serve an indexed file (PDF, PPTX, DOCX, TXT)."""
-    root = _get_root_folder()
-    if not root:
+    root = _get_root_path()
+    if root is None:
         raise HTTPException(status_code=400, detail="No indexed folder found")
 
-    full_path = Path(root) / file_path
+    full_path = root / file_path
     if not full_path.is_file():
         raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
     ext = full_path.suffix.lower()
@@ -281,18 +603,32 @@ def api_serve_file(file_path: str):
 
 
 @app.get("/pdf/{file_path:path}")
-def api_serve_pdf(file_path: str):
+async def api_serve_pdf(file_path: str):
     """Serve a PDF file (backward compat)."""
-    return api_serve_file(file_path)
+    return await api_serve_file(file_path)
+
+
+def _read_page_text(file_path: str, page_number: int) -> str:
+    """Text of one indexed page, or 404 if it can't be read."""
+    text = _load_page_texts([(file_path, page_number)]).get((file_path, page_number))
+    if not text:
+        raise HTTPException(status_code=404, detail=f"Page {page_number} of {file_path} not found")
+    return text
+
+
+@app.get("/page-text/{file_path:path}", response_model=PageTextResponse)
+def api_page_text(file_path: str, page: int = Query(..., ge=1)):
+    """Return the full text of an indexed page."""
+    return PageTextResponse(text=_read_page_text(file_path, page))
 
 
 @app.post("/summarize", response_model=SummarizeResponse)
-def api_summarize(req: SummarizeRequest):
+async def api_summarize(req: SummarizeRequest):
     """Generate an LLM summary of a slide page in the context of a query."""
     query = req.query.strip()
-    text = req.text.strip()
-    if not query or not text:
-        raise HTTPException(status_code=400, detail="Both query and text are required")
+    if not query:
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+    text = await asyncio.to_thread(_read_page_text, req.file_path, req.page_number)
 
     prompt = (
         f"/no_think\n"
@@ -303,80 +639,178 @@ def api_summarize(req: SummarizeRequest):
     )
 
     try:
-        response = ollama.chat(
-            model=LLM_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-        )
-        summary = response.message.content.strip()
+        response = await _ollama_async.post("/api/chat", json={
+            "model": LLM_MODEL,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": False,
+            "keep_alive": KEEP_ALIVE,
+        })
+        response.raise_for_status()
+        summary = response.json()["message"]["content"].strip()
         return SummarizeResponse(summary=summary)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"LLM error: {e}")
 
 
 @app.get("/page-image/{file_path:path}")
-def api_page_image(file_path: str, page: int = Query(..., ge=1)):
-    """Render a page as a PNG image. Only supported for PDF files."""
-    root = _get_root_folder()
-    if not root:
+def api_page_image(
+    file_path: str,
+    page: int = Query(..., ge=1),
+    scale: float = Query(PAGE_IMAGE_SCALE, gt=0, le=4),
+    if_none_match: str | None = Header(None),
+):
+    """Render a page as a JPEG image. Only supported for PDF files.
+
+    `scale` is relative to the page's size in points; thumbnails can ask
+    for less than the default 2x.
+    """
+    # Cheapest check first, before touching the filesystem
+    if not file_path.lower().endswith(".pdf"):
+        # Non-PDF files don't have image previews
+        raise HTTPException(status_code=415, detail="Image preview only available for PDF files")
+
+    root = _get_root_path()
+    if root is None:
         raise HTTPException(status_code=400, detail="No indexed folder found")
 
-    full_path = Path(root) / file_path
+    full_path = root / file_path
     if not full_path.is_file():
         raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
 
-    ext = full_path.suffix.lower()
-    if ext != ".pdf":
-        # Non-PDF files don't have image previews
-        raise HTTPException(status_code=415, detail="Image preview only available for PDF files")
+    mtime_ns = full_path.stat().st_mtime_ns
+    key = hashlib.sha1(f"{full_path}:{mtime_ns}:{page}:{scale}x".encode()).hexdigest()
+    # The URL stays the same when the file is edited, so the browser must
+    # revalidate; the key doubles as the ETag, making that a cheap 304
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match is not None and etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    cache_path = PAGE_CACHE_DIR / f"{key}.jpg"
+    if cache_path.is_file():
+        with contextlib.suppress(OSError):
+            os.utime(cache_path)  # mark as recently used for pruning
+        return FileResponse(cache_path, media_type="image/jpeg", headers=headers)
 
-    doc = fitz.open(str(full_path))
     page_index = page - 1  # convert 1-indexed to 0-indexed
-    num_pages = len(doc)
-    if page_index < 0 or page_index >= num_pages:
-        doc.close()
-        raise HTTPException(status_code=404, detail=f"Page {page} not found (PDF has {num_pages} pages)")
-
-    # Render at 2x for retina quality
-    pixmap = doc[page_index].get_pixmap(matrix=fitz.Matrix(2.0, 2.0))
-    image_bytes = pixmap.tobytes("png")
-    doc.close()
-
-    return Response(content=image_bytes, media_type="image/png")
-
-
-@app.post("/chat", response_model=ChatResponse)
-def api_chat(req: ChatRequest):
-    """RAG chat: retrieve relevant pages, then answer with citations."""
+    with _pdf_docs_lock:
+        doc = _get_pdf_doc(full_path, mtime_ns)
+        num_pages = len(doc)
+        if page_index < 0 or page_index >= num_pages:
+            raise HTTPException(status_code=404, detail=f"Page {page} not found (PDF has {num_pages} pages)")
+
+        pixmap = doc[page_index].get_pixmap(matrix=fitz.Matrix(scale, scale))
+    # JPEG encodes much faster than PNG's deflate and is far smaller for
+    # slides with photos or gradients (PyMuPDF can't write WebP)
+    image_bytes = pixmap.tobytes("jpeg", jpg_quality=PAGE_IMAGE_QUALITY)
+
+    # Write to a temp file first so a concurrent request never serves a
+    # partly written image
+    PAGE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(f".{threading.get_ident()}.tmp")
+    tmp_path.write_bytes(image_bytes)
+    os.replace(tmp_path, cache_path)
+    _add_to_page_cache(len(image_bytes))
+
+    return Response(content=image_bytes, media_type="image/jpeg", headers=headers)
+
+
+async def _load_llm() -> None:
+    """Have Ollama load the chat model (and keep it loaded) ahead of a chat call."""
+    with contextlib.suppress(httpx.HTTPError):
+        await _ollama_async.post("/api/generate", json={
+            "model": LLM_MODEL,
+            "keep_alive": KEEP_ALIVE,
+        })
+
+async def _warm_up() -> None:
+    """Load the embedding and chat models ahead of the first request."""
+    # Ollama may not be running yet; the first real request will then
+    # report the problem
+    with contextlib.suppress(Exception):
+        await asyncio.to_thread(generate_embeddings, ["warmup"])
+    await _load_llm()
+
+def _trim_history(history: list[ChatMessage]) -> list[ChatMessage]:
+    """Keep the most recent messages that fit in CHAT_HISTORY_TOKENS.
+
+    The last exchange is always kept so follow-up questions still make sense.
+    """
+    budget = CHAT_HISTORY_TOKENS * CHARS_PER_TOKEN
+    used = kept = 0
+    for msg in reversed(history):
+        used += len(msg.content)
+        if used > budget and kept >= 2:
+            break
+        kept += 1
+    return history[len(history) - kept:]
+
+def _sse(data: dict) -> str:
+    """Format one Server-Sent Events message."""
+    return f"data: {json.dumps(data)}\n\n"
+
+def _fix_citations(answer: str, sources: list[ChatSource]) -> str:
+    """Replace generic [File, Page N] citations with real filenames."""
+    # Build a map from page number to real citation label.
+    page_to_citation: dict[int, str] = {}
+    for s in sources:
+        page_to_citation[s.page_number] = f"[{s.file_path}, Page {s.page_number}]"
+
+    def _fix_citation(m: re.Match) -> str:
+        pg = int(m.group(1))
+        return page_to_citation.get(pg, m.group(0))
+
+    answer = re.sub(r"\[File,\s*Page\s+(\d+)\]", _fix_citation, answer)
+    # Also catch [file, page N] and [File, page N] variants
+    return re.sub(r"\[(?:[Ff]ile),\s*[Pp]age\s+(\d+)\]", _fix_citation, answer)
+
+@app.post("/chat")
+async def api_chat(req: ChatRequest):
+    """RAG chat: retrieve relevant pages, then stream an answer with citations.
+
+    The answer is sent as Server-Sent Events: {"delta": text} as tokens
+    arrive, then {"done": true, "answer": ..., "sources": [...]} where the
+    answer has its citations fixed up. A failure mid-answer is sent as
+    {"error": message}.
+    """
     question = req.question.strip()
     if not question:
         raise HTTPException(status_code=400, detail="Question cannot be empty")
 
-    try:
-        client = chromadb.PersistentClient(path=CHROMA_DIR)
-        collection = client.get_collection(COLLECTION_NAME)
-    except Exception:
-        raise HTTPException(status_code=400, detail="No index found. Please index a folder first.")
-
-    # Retrieve relevant pages
-    query_embedding = ollama.embed(model=EMBED_MODEL, input=question).embeddings[0]
-    raw = collection.query(
-        query_embeddings=[query_embedding],
-        n_results=req.n_context + 1,
-        where={"file_path": {"$ne": "__root__"}},
+    # Get the chat model loading while retrieval runs
+    llm_ready = asyncio.create_task(_load_llm())
+
+    # Retrieve relevant pages; opening the collection and embedding the
+    # question don't depend on each other
+    _, query_embedding = await asyncio.gather(
+        asyncio.to_thread(_get_collection),
+        asyncio.to_thread(_embed_query, _normalize_query(question)),
+    )
+    raw = await asyncio.to_thread(
+        _query_collection,
+        query_embeddings=[list(query_embedding)],
+        n_results=req.n_context,
+        include=["metadatas"],
     )
+    metas = raw["metadatas"][0]
 
     # Build context from retrieved pages
     sources: list[ChatSource] = []
     context_parts: list[str] = []
     citation_list: list[str] = []
-    for i in range(min(len(raw["ids"][0]), req.n_context)):
-        meta = raw["metadatas"][0][i]
-        text = raw["documents"][0][i]
+    context_budget = CHAT_CONTEXT_TOKENS * CHARS_PER_TOKEN
+    for meta in metas:
         fp = meta["file_path"]
         pg = meta["page_number"]
-        sources.append(ChatSource(file_path=fp, page_number=pg))
         label = f"[{fp}, Page {pg}]"
-        context_parts.append(f"{label}\n{text[:1500]}")
+        # Already cut to length at index time
+        part = f"{label}\n{meta['context']}"
+        # Hits are sorted by distance, so over budget the weakest are dropped
+        context_budget -= len(part)
+        if context_budget < 0 and context_parts:
+            break
+        if not any(s.file_path == fp and s.page_number == pg for s in sources):
+            sources.append(ChatSource(file_path=fp, page_number=pg))
+        context_parts.append(part)
         citation_list.append(label)
 
     context_block = "\n\n---\n\n".join(context_parts)
@@ -395,28 +829,41 @@ def api_chat(req: ChatRequest):
     )
 
     messages = [{"role": "system", "content": system_prompt}]
-    for msg in req.history[-10:]:  # keep last 10 messages for context window
+    for msg in _trim_history(req.history):
         messages.append({"role": msg.role, "content": msg.content})
     messages.append({"role": "user", "content": question})
 
-    try:
-        response = ollama.chat(model=LLM_MODEL, messages=messages)
-        answer = response.message.content.strip()
-
-        # Post-process: replace generic [File, Page N] with real filenames.
-        # Build a map from page number to real citation label.
-        page_to_citation: dict[int, str] = {}
-        for s in sources:
-            page_to_citation[s.page_number] = f"[{s.file_path}, Page {s.page_number}]"
-
-        def _fix_citation(m: re.Match) -> str:
-            pg = int(m.group(1))
-            return page_to_citation.get(pg, m.group(0))
-
-        answer = re.sub(r"\[File,\s*Page\s+(\d+)\]", _fix_citation, answer)
-        # Also catch [file, page N] and [File, page N] variants
-        answer = re.sub(r"\[(?:[Ff]ile),\s*[Pp]age\s+(\d+)\]", _fix_citation, answer)
-
-        return ChatResponse(answer=answer, sources=sources)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"LLM error: {e}")
+    async def events():
+        parts: list[str] = []
+        await llm_ready
+        try:
+            async with _ollama_async.stream("POST", "/api/chat", json={
+                "model": LLM_MODEL,
+                "messages": messages,
+                "stream": True,
+                "keep_alive": KEEP_ALIVE,
+            }) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if "error" in chunk:
+                        raise RuntimeError(chunk["error"])
+                    delta = chunk["message"]["content"]
+                    if delta:
+                        parts.append(delta)
+                        yield _sse({"delta": delta})
+        except Exception as e:
+            yield _sse({"error": f"LLM error: {e}"})
+            return
+
+        # Post-process the full answer: citations can span several deltas
+        answer = _fix_citations("".join(parts).strip(), sources)
+        yield _sse({
+            "done": True,
+            "answer": answer,
+            "sources": [s.model_dump() for s in sources],
+        })
+
+    return StreamingResponse(events(), media_type="text/event-stream")
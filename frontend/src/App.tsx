@@ -1,5 +1,5 @@
 import { useState, useRef, useEffect, useCallback } from "react";
-import { browseFolder, indexFolder, searchSlides, summarize, getPdfUrl, getPageImageUrl, getFileUrl, isPdf } from "./api";
+import { browseFolder, indexFolder, searchSlides, summarize, getPdfUrl, getPageImageUrl, getFileUrl, getPageText, isPdf } from "./api";
 import type { SearchResult, IndexResponse } from "./api";
 import ChatView from "./ChatView";
 import "./App.css";
@@ -67,6 +67,35 @@ function groupResults(results: SearchResult[]): ResultGroup[] {
   return groups;
 }
 
+/** Text preview for non-PDF results; page text is fetched when shown. */
+function TextPreview({ filePath, page }: { filePath: string; page: number }) {
+  const [text, setText] = useState<string | null>(null);
+
+  useEffect(() => {
+    let cancelled = false;
+    getPageText(filePath, page)
+      .then((t) => {
+        if (!cancelled) setText(t);
+      })
+      .catch(() => {
+        if (!cancelled) setText("");
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [filePath, page]);
+
+  if (text === null) {
+    return <div className="result-text-preview">Loading...</div>;
+  }
+  return (
+    <div className="result-text-preview">
+      {text.slice(0, 500)}
+      {text.length > 500 && "..."}
+    </div>
+  );
+}
+
 // ── App Component ─────────────────────────────────────────────────
 
 type Tab = "search" | "chat";
@@ -124,7 +153,7 @@ function App() {
 
         setSummaries((prev) => ({ ...prev, [key]: null })); // null = loading
         try {
-          const res = await summarize(query, r.full_text);
+          const res = await summarize(query, r.file_path, r.page_number);
           if (summaryAbortRef.current) break;
           setSummaries((prev) => ({ ...prev, [key]: res.summary }));
         } catch {
@@ -432,7 +461,7 @@ function App() {
                     {isPdf(r.file_path) ? (
                       <img
                         className="result-thumbnail"
-                        src={getPageImageUrl(r.file_path, r.page_number)}
+                        src={getPageImageUrl(r.file_path, r.page_number, 1)}
                         alt={`${r.file_path} page ${r.page_number}`}
                         loading="lazy"
                         onClick={() =>
@@ -443,10 +472,7 @@ function App() {
                         }
                       />
                     ) : (
-                      <div className="result-text-preview">
-                        {r.full_text.slice(0, 500)}
-                        {r.full_text.length > 500 && "..."}
-                      </div>
+                      <TextPreview filePath={r.file_path} page={r.page_number} />
                     )}
                     <p className="result-snippet">
                       {highlightSnippet(r.text_snippet, lastQuery)}
@@ -12,12 +12,13 @@ function ChatView() {
   const [input, setInput] = useState("");
   const [messages, setMessages] = useState<DisplayMessage[]>([]);
   const [loading, setLoading] = useState(false);
+  const [streamingText, setStreamingText] = useState("");
   const [error, setError] = useState("");
   const bottomRef = useRef<HTMLDivElement>(null);
 
   useEffect(() => {
     bottomRef.current?.scrollIntoView({ behavior: "smooth" });
-  }, [messages, loading]);
+  }, [messages, loading, streamingText]);
 
   const handleSend = async () => {
     const q = input.trim();
@@ -36,7 +37,9 @@ function ChatView() {
     }));
 
     try {
-      const res = await chatWithSlides(q, history);
+      const res = await chatWithSlides(q, history, (delta) =>
+        setStreamingText((prev) => prev + delta)
+      );
       const assistantMsg: DisplayMessage = {
         role: "assistant",
         content: res.answer,
@@ -47,6 +50,7 @@ function ChatView() {
       setError(e instanceof Error ? e.message : "Chat failed");
     } finally {
       setLoading(false);
+      setStreamingText("");
     }
   };
 
@@ -94,9 +98,13 @@ function ChatView() {
         ))}
         {loading && (
           <div className="chat-bubble chat-bubble-assistant">
-            <div className="chat-bubble-content chat-thinking">
-              <span className="spinner spinner-small" /> Thinking...
-            </div>
+            {streamingText ? (
+              <div className="chat-bubble-content">{streamingText}</div>
+            ) : (
+              <div className="chat-bubble-content chat-thinking">
+                <span className="spinner spinner-small" /> Thinking...
+              </div>
+            )}
           </div>
         )}
         {error && <p className="error">{error}</p>}
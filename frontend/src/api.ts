@@ -4,7 +4,6 @@ export interface SearchResult {
   file_path: string;
   page_number: number;
   text_snippet: string;
-  full_text: string;
   similarity_score: number;
 }
 
@@ -71,12 +70,13 @@ export interface SummarizeResponse {
 
 export async function summarize(
   query: string,
-  text: string
+  filePath: string,
+  pageNumber: number
 ): Promise<SummarizeResponse> {
   const res = await fetch(`${BASE}/summarize`, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ query, text }),
+    body: JSON.stringify({ query, file_path: filePath, page_number: pageNumber }),
   });
   if (!res.ok) {
     const err = await res.json();
@@ -85,6 +85,20 @@ export async function summarize(
   return res.json();
 }
 
+export async function getPageText(filePath: string, page: number): Promise<string> {
+  const encoded = filePath
+    .split("/")
+    .map(encodeURIComponent)
+    .join("/");
+  const res = await fetch(`${BASE}/page-text/${encoded}?page=${page}`);
+  if (!res.ok) {
+    const err = await res.json();
+    throw new Error(err.detail || "Failed to load page text");
+  }
+  const data: { text: string } = await res.json();
+  return data.text;
+}
+
 export interface ChatMessage {
   role: "user" | "assistant";
   content: string;
@@ -100,28 +114,50 @@ export interface ChatResponse {
   sources: ChatSource[];
 }
 
+// The answer streams back as server-sent events: `onDelta` receives text as
+// it is generated, and the final event carries the cleaned-up answer.
 export async function chatWithSlides(
   question: string,
-  history: ChatMessage[] = []
+  history: ChatMessage[] = [],
+  onDelta?: (text: string) => void
 ): Promise<ChatResponse> {
   const res = await fetch(`${BASE}/chat`, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
     body: JSON.stringify({ question, history }),
   });
-  if (!res.ok) {
+  if (!res.ok || !res.body) {
     const err = await res.json();
     throw new Error(err.detail || "Chat failed");
   }
-  return res.json();
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const events = buffer.split("\n\n");
+    buffer = events.pop() ?? "";
+    for (const event of events) {
+      if (!event.startsWith("data: ")) continue;
+      const data = JSON.parse(event.slice("data: ".length));
+      if (data.error) throw new Error(data.error);
+      if (data.done) return { answer: data.answer, sources: data.sources };
+      onDelta?.(data.delta);
+    }
+  }
+  throw new Error("Chat ended unexpectedly");
 }
 
-export function getPageImageUrl(filePath: string, page: number): string {
+export function getPageImageUrl(filePath: string, page: number, scale?: number): string {
   const encoded = filePath
     .split("/")
     .map(encodeURIComponent)
     .join("/");
-  return `${BASE}/page-image/${encoded}?page=${page}`;
+  const url = `${BASE}/page-image/${encoded}?page=${page}`;
+  return scale ? `${url}&scale=${scale}` : url;
 }
 
 export function getPdfUrl(filePath: string, page?: number): string {